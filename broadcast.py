@@ -0,0 +1,210 @@
+# broadcast.py
+import os
+import sqlite3
+import logging
+import time
+
+from telegram.error import RetryAfter, Unauthorized, BadRequest, TelegramError
+
+logger = logging.getLogger("GrowTogether.broadcast")
+
+# Telegram allows ~30 msg/s per bot; stay under it so replies still get through.
+BROADCAST_RATE = int(os.getenv("BROADCAST_RATE", 20))   # messages per tick
+BROADCAST_INTERVAL = 1.0                                 # seconds per tick
+BROADCAST_IDLE = 5.0                                     # poll delay with nothing to send
+BROADCAST_BACKOFF = 5.0                                  # delay after a network error
+BROADCAST_MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", 5))   # per recipient
+
+
+def ensure_schema(conn):
+    """
+    Known users plus broadcast state. Each broadcast snapshots its recipients
+    and keeps a cursor (last user_id handled), so a restart picks up where it
+    stopped instead of starting over. `attempts` counts failed sends to the
+    user right after the cursor.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        blocked INTEGER DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS broadcasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        text TEXT NOT NULL,
+        admin_chat_id INTEGER,
+        status TEXT DEFAULT 'running',
+        cursor INTEGER DEFAULT 0,
+        total INTEGER DEFAULT 0,
+        sent INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        blocked INTEGER DEFAULT 0,
+        attempts INTEGER DEFAULT 0,
+        created_at INTEGER,
+        finished_at INTEGER
+    )
+    """)
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(broadcasts)")}
+    if "attempts" not in columns:
+        cur.execute("ALTER TABLE broadcasts ADD COLUMN attempts INTEGER DEFAULT 0")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS broadcast_recipients (
+        broadcast_id INTEGER,
+        user_id INTEGER,
+        PRIMARY KEY (broadcast_id, user_id)
+    ) WITHOUT ROWID
+    """)
+    conn.commit()
+
+
+def remember_user(conn, user):
+    """Record a user we've seen so they can receive broadcasts."""
+    conn.execute(
+        "INSERT INTO users (user_id, username) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET username = excluded.username, blocked = 0",
+        (user.id, user.username),
+    )
+    conn.commit()
+
+
+def start_broadcast(conn, text, admin_chat_id, user_ids=()):
+    """
+    Snapshot the recipient set and queue a broadcast. Returns (id, total).
+    `user_ids` adds users known to the repository who never ran /start.
+    """
+    cur = conn.cursor()
+    cur.executemany("INSERT OR IGNORE INTO users (user_id) VALUES (?)", ((uid,) for uid in user_ids))
+    cur.execute(
+        "INSERT INTO broadcasts (text, admin_chat_id, created_at) VALUES (?, ?, ?)",
+        (text, admin_chat_id, int(time.time())),
+    )
+    bid = cur.lastrowid
+    cur.execute(
+        "INSERT INTO broadcast_recipients (broadcast_id, user_id) "
+        "SELECT ?, user_id FROM users WHERE blocked = 0 AND user_id IS NOT NULL",
+        (bid,),
+    )
+    total = cur.rowcount
+    cur.execute("UPDATE broadcasts SET total = ? WHERE id = ?", (total, bid))
+    conn.commit()
+    return bid, total
+
+
+def broadcast_status(conn, broadcast_id=None):
+    """Latest (or given) broadcast as a dict, or None."""
+    cur = conn.cursor()
+    if broadcast_id is None:
+        cur.execute("SELECT id, status, total, sent, failed, blocked FROM broadcasts ORDER BY id DESC LIMIT 1")
+    else:
+        cur.execute("SELECT id, status, total, sent, failed, blocked FROM broadcasts WHERE id = ?", (broadcast_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return dict(zip(("id", "status", "total", "sent", "failed", "blocked"), row))
+
+
+def format_status(status):
+    return (
+        f"📣 Broadcast #{status['id']} — <b>{status['status']}</b>\n"
+        f"✅ Sent: {status['sent']}/{status['total']}\n"
+        f"⚠️ Failed: {status['failed']}\n"
+        f"🚫 Blocked: {status['blocked']}"
+    )
+
+
+def _run_tick(bot, conn):
+    """
+    Send at most BROADCAST_RATE messages, stopping early once the tick has
+    used up BROADCAST_INTERVAL. Returns the delay in seconds before the next
+    tick, so slow sends lower the batch size instead of overlapping ticks.
+    """
+    started = time.monotonic()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id, text, cursor, attempts, admin_chat_id FROM broadcasts "
+        "WHERE status = 'running' ORDER BY id LIMIT 1"
+    )
+    row = cur.fetchone()
+    if not row:
+        return BROADCAST_IDLE
+    bid, text, last_uid, attempts, admin_chat_id = row
+    cur.execute(
+        "SELECT user_id FROM broadcast_recipients WHERE broadcast_id = ? AND user_id > ? ORDER BY user_id LIMIT ?",
+        (bid, last_uid, BROADCAST_RATE),
+    )
+    batch = [r[0] for r in cur.fetchall()]
+
+    for handled, uid in enumerate(batch):
+        if handled and time.monotonic() - started >= BROADCAST_INTERVAL:
+            return 0
+        column = "sent"
+        try:
+            bot.send_message(uid, text, parse_mode="HTML", disable_web_page_preview=True)
+        except RetryAfter as e:
+            logger.warning(f"Broadcast #{bid} throttled, retry after {e.retry_after}s")
+            return e.retry_after
+        except Unauthorized:
+            column = "blocked"
+            cur.execute("UPDATE users SET blocked = 1 WHERE user_id = ?", (uid,))
+        except BadRequest:
+            column = "failed"
+        except TelegramError as e:
+            # Network trouble: leave the cursor where it is and retry later,
+            # unless this user keeps failing; then give up on them.
+            attempts += 1
+            if attempts < BROADCAST_MAX_ATTEMPTS:
+                logger.warning(f"Broadcast #{bid} paused on {uid} (attempt {attempts}): {e}")
+                cur.execute("UPDATE broadcasts SET attempts = ? WHERE id = ?", (attempts, bid))
+                conn.commit()
+                return BROADCAST_BACKOFF
+            logger.warning(f"Broadcast #{bid} giving up on {uid} after {attempts} attempts: {e}")
+            column = "failed"
+        # Checkpoint after every message so a crash never re-sends.
+        cur.execute(
+            f"UPDATE broadcasts SET cursor = ?, attempts = 0, {column} = {column} + 1 WHERE id = ?",
+            (uid, bid),
+        )
+        conn.commit()
+        attempts = 0
+
+    if len(batch) < BROADCAST_RATE:
+        cur.execute(
+            "UPDATE broadcasts SET status = 'done', finished_at = ? WHERE id = ?",
+            (int(time.time()), bid),
+        )
+        cur.execute("DELETE FROM broadcast_recipients WHERE broadcast_id = ?", (bid,))
+        conn.commit()
+        status = broadcast_status(conn, bid)
+        logger.info(f"Broadcast #{bid} finished: {status}")
+        if admin_chat_id:
+            try:
+                bot.send_message(admin_chat_id, format_status(status), parse_mode="HTML")
+            except TelegramError:
+                pass
+        return 0
+    return max(0.0, BROADCAST_INTERVAL - (time.monotonic() - started))
+
+
+def schedule_broadcasts(job_queue, db_path):
+    """
+    Start the broadcast worker on a PTB JobQueue. Each tick schedules the
+    next one with run_once, so ticks never overlap, and it runs on the job
+    thread rather than a dispatcher worker so handlers aren't starved.
+    Unfinished broadcasts resume automatically on startup.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    ensure_schema(conn)
+
+    def _job(context):
+        delay = BROADCAST_BACKOFF
+        try:
+            delay = _run_tick(context.bot, conn)
+        except Exception:
+            logger.exception("Broadcast tick failed")
+        finally:
+            context.job_queue.run_once(_job, when=delay, name="broadcast_worker")
+
+    job_queue.run_once(_job, when=BROADCAST_INTERVAL, name="broadcast_worker")
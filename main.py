@@ -31,6 +31,7 @@ except ImportError:
 
 from flask import Flask, request, abort
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     Updater,
     CommandHandler,
@@ -38,9 +39,15 @@ from telegram.ext import (
     CallbackQueryHandler,
     Filters,
     CallbackContext,
+    TypeHandler,
+    DispatcherHandlerStop,
 )
 
 from keep_alive import keep_alive
+from maintenance import schedule_maintenance
+import broadcast
+from ratelimit import RateLimiter, update_command
+from storage import open_repository, SQLiteRepository, LEASE_SECONDS
 
 # -------------------------------------------------
 # CONFIG
@@ -61,41 +68,45 @@ ADMIN_IDS = {5002083764, 1835452655, 5838038047, 2112909022}
 # DATABASE
 # -------------------------------------------------
 DB_PATH = "tasks.db"
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-cur = conn.cursor()
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS tasks (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    niche TEXT,
-    platform TEXT,
-    name TEXT NOT NULL,
-    points INTEGER NOT NULL,
-    url TEXT DEFAULT NULL
-)
-""")
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS user_progress (
-    user_id INTEGER,
-    username TEXT,
-    task_id INTEGER,
-    completed INTEGER DEFAULT 0,
-    points INTEGER DEFAULT 0,
-    proof TEXT DEFAULT NULL
-)
-""")
-conn.commit()
+repo = open_repository(DB_PATH)
+
+# Broadcast progress always lives in SQLite so it survives restarts.
+# Handlers share one connection, so calls on it go through broadcast_lock.
+broadcast_conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+broadcast_lock = threading.Lock()
+broadcast.ensure_schema(broadcast_conn)
 
 # -------------------------------------------------
 # GLOBAL
 # -------------------------------------------------
 proof_waiting = {}
+rate_limiter = RateLimiter()
 
 # -------------------------------------------------
 # HANDLERS (ALL OPERATIONS + CLEAN UI)
 # -------------------------------------------------
+def throttle(update: Update, context: CallbackContext):
+    user = update.effective_user
+    if not user or user.id in ADMIN_IDS:
+        return
+    if not rate_limiter.allow(user.id, update_command(update)):
+        raise DispatcherHandlerStop()
+
+
+def rate_stats(update: Update, context: CallbackContext):
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    stats = rate_limiter.stats()
+    shed = "\n".join(f"• {k}: {v}" for k, v in sorted(stats["shed"].items())) or "• none"
+    update.message.reply_text(
+        f"<b>🚦 Rate limiter</b>\n\nActive buckets: {stats['buckets']}\nShed updates:\n{shed}",
+        parse_mode="HTML"
+    )
+
+
 def start(update: Update, context: CallbackContext):
+    with broadcast_lock:
+        broadcast.remember_user(broadcast_conn, update.effective_user)
     text = (
         "👋 Welcome to <b>💼 Crypto Growth Bot</b>! 🚀\n\n"
         "🎯 Complete tasks, earn rewards, and rise up the leaderboard! 📈\n\n"
@@ -124,12 +135,74 @@ def add_task(update: Update, context: CallbackContext):
     niche, platform = context.args[0], context.args[1]
     name = " ".join(context.args[2:-2])
     url, points = context.args[-2], int(context.args[-1])
-    cur.execute(
-        "INSERT INTO tasks (niche, platform, name, points, url) VALUES (?, ?, ?, ?, ?)",
-        (niche, platform, name, points, url)
+    task_id = repo.add_task(niche, platform, name, points, url)
+    update.message.reply_text(
+        f"📝 Task #{task_id} added successfully ✅\n"
+        f"📣 Announce it with <code>/announce_task {task_id}</code>",
+        parse_mode="HTML"
+    )
+
+
+def broadcast_cmd(update: Update, context: CallbackContext):
+    if update.effective_user.id not in ADMIN_IDS:
+        update.message.reply_text("⚠️ Only authorized admins can send broadcasts.")
+        return
+    if not context.args:
+        update.message.reply_text("📘 Usage: <code>/broadcast [message]</code>", parse_mode="HTML")
+        return
+    text = update.message.text.split(None, 1)[1]
+    # Broadcasts go out as HTML; a preview to the admin catches bad markup
+    # before every recipient rejects it.
+    try:
+        context.bot.send_message(
+            update.effective_chat.id, text, parse_mode="HTML", disable_web_page_preview=True
+        )
+    except BadRequest as e:
+        update.message.reply_text(
+            f"⚠️ Broadcast not queued, the message is not valid HTML:\n<code>{escape(str(e))}</code>",
+            parse_mode="HTML"
+        )
+        return
+    user_ids = repo.known_user_ids()
+    with broadcast_lock:
+        bid, total = broadcast.start_broadcast(broadcast_conn, text, update.effective_chat.id, user_ids)
+    update.message.reply_text(f"📣 Preview above. Broadcast #{bid} queued for {total} users 🚀")
+
+
+def announce_task(update: Update, context: CallbackContext):
+    if update.effective_user.id not in ADMIN_IDS:
+        update.message.reply_text("⚠️ Only authorized admins can send broadcasts.")
+        return
+    try:
+        task_id = int(context.args[0])
+    except (IndexError, ValueError):
+        update.message.reply_text("📘 Usage: <code>/announce_task [task_id]</code>", parse_mode="HTML")
+        return
+    task = repo.get_task(task_id)
+    if not task:
+        update.message.reply_text("📂 Task not found.")
+        return
+    text = (
+        f"🆕 <b>New Task #{task.id}</b>\n"
+        f"{escape(task.platform or '')}: <i>{escape(task.name)}</i>\n"
+        f"Reward: <b>{task.points} pts</b>\n\n"
+        "👉 Use /list_tasks to get started!"
     )
-    conn.commit()
-    update.message.reply_text(f"📝 Task #{cur.lastrowid} added successfully ✅")
+    user_ids = repo.known_user_ids()
+    with broadcast_lock:
+        bid, total = broadcast.start_broadcast(broadcast_conn, text, update.effective_chat.id, user_ids)
+    update.message.reply_text(f"📣 Broadcast #{bid} queued for {total} users 🚀")
+
+
+def broadcast_status(update: Update, context: CallbackContext):
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    with broadcast_lock:
+        status = broadcast.broadcast_status(broadcast_conn)
+    if not status:
+        update.message.reply_text("📭 No broadcasts yet.")
+        return
+    update.message.reply_text(broadcast.format_status(status), parse_mode="HTML")
 
 
 def remove_task(update: Update, context: CallbackContext):
@@ -140,22 +213,19 @@ def remove_task(update: Update, context: CallbackContext):
         update.message.reply_text("📘 Usage: <code>/remove_task [task_id]</code>")
         return
     task_id = int(context.args[0])
-    cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-    conn.commit()
+    repo.remove_task(task_id)
     update.message.reply_text(f"📝 Task #{task_id} has been removed 🗑️")
 
 
 def list_tasks(update: Update, context: CallbackContext):
     niche = context.args[0].lower() if context.args else "crypto"
-    cur.execute(
-        "SELECT id, platform, name, points, url FROM tasks WHERE niche = ?", (niche,)
-    )
-    rows = cur.fetchall()
-    if not rows:
+    tasks = repo.list_tasks(niche)
+    if not tasks:
         update.message.reply_text(f"📂 No available tasks in <b>{niche}</b> niche.", parse_mode="HTML")
         return
 
-    for tid, plat, name, pts, url in rows:
+    for task in tasks:
+        tid, plat, name, pts, url = task.id, task.platform or "", task.name, task.points, task.url
         platform_icon = {
             "twitter": "Twitter", "x": "X", "instagram": "Instagram", "youtube": "YouTube",
             "tiktok": "TikTok", "discord": "Discord", "telegram": "Telegram", "website": "Website"
@@ -199,11 +269,9 @@ def handle_photo(update: Update, context: CallbackContext):
         return
     task_id = proof_waiting.pop(user_id)
     file_id = update.message.photo[-1].file_id
-    cur.execute(
-        "INSERT OR REPLACE INTO user_progress (user_id, task_id, proof, completed) VALUES (?, ?, ?, 0)",
-        (user_id, task_id, file_id),
-    )
-    conn.commit()
+    if not repo.submit_proof(user_id, task_id, file_id):
+        update.message.reply_text("⚡ You’ve already completed this task!")
+        return
     update.message.reply_text(
         "✅ Proof submitted successfully!\n"
         "🕵️‍♂️ Our admins will review your submission shortly.\n"
@@ -214,14 +282,22 @@ def handle_photo(update: Update, context: CallbackContext):
 def review_proofs(update: Update, context: CallbackContext):
     if update.effective_user.id not in ADMIN_IDS:
         return
-    cur.execute(
-        "SELECT user_id, task_id, proof FROM user_progress WHERE proof IS NOT NULL AND completed = 0"
-    )
-    rows = cur.fetchall()
+    rows = repo.claim_proofs(update.effective_user.id)
     if not rows:
-        update.message.reply_text("📭 No pending proofs to review at the moment.")
+        held = repo.held_proofs(update.effective_user.id)
+        update.message.reply_text(
+            f"📭 No new proofs to review. You still hold {held} undecided."
+            if held else "📭 No pending proofs to review at the moment."
+        )
         return
-    for uid, tid, fid in rows:
+    held = repo.held_proofs(update.effective_user.id)
+    update.message.reply_text(
+        f"🕵️‍♂️ {len(rows)} new proofs reserved for you for {LEASE_SECONDS // 60} min "
+        f"({held} held in total).\n"
+        "Run /review_proofs again for the next batch."
+    )
+    for proof in rows:
+        uid, tid, fid = proof.user_id, proof.task_id, proof.file_id
         context.bot.send_photo(
             update.effective_chat.id,
             fid,
@@ -251,20 +327,16 @@ def button_handler(update: Update, context: CallbackContext):
 
     elif data.startswith("remove_") and update.effective_user.id in ADMIN_IDS:
         tid = int(data.split("_")[1])
-        cur.execute("DELETE FROM tasks WHERE id = ?", (tid,))
-        conn.commit()
+        repo.remove_task(tid)
         q.edit_message_text(f"📝 Task #{tid} has been removed 🗑️")
 
-    elif data.startswith("approve_"):
+    elif data.startswith("approve_") and update.effective_user.id in ADMIN_IDS:
         _, uid, tid = data.split("_")
         uid, tid = int(uid), int(tid)
-        cur.execute("SELECT points FROM tasks WHERE id = ?", (tid,))
-        pts = cur.fetchone()[0]
-        cur.execute(
-            "UPDATE user_progress SET completed = 1, points = ? WHERE user_id = ? AND task_id = ?",
-            (pts, uid, tid)
-        )
-        conn.commit()
+        pts = repo.approve_proof(update.effective_user.id, uid, tid)
+        if pts is None:
+            q.edit_message_caption("⚠️ Already handled by another admin, or the task was removed.")
+            return
         q.edit_message_caption(caption=f"<b>🎉 APPROVED</b> +{pts} pts", parse_mode="HTML")
         try:
             context.bot.send_message(
@@ -276,11 +348,12 @@ def button_handler(update: Update, context: CallbackContext):
         except:
             pass
 
-    elif data.startswith("reject_"):
+    elif data.startswith("reject_") and update.effective_user.id in ADMIN_IDS:
         _, uid, tid = data.split("_")
         uid, tid = int(uid), int(tid)
-        cur.execute("DELETE FROM user_progress WHERE user_id = ? AND task_id = ?", (uid, tid))
-        conn.commit()
+        if not repo.reject_proof(update.effective_user.id, uid, tid):
+            q.edit_message_caption("⚠️ Already handled by another admin.")
+            return
         q.edit_message_caption("❌ ❌ Rejected.")
         try:
             context.bot.send_message(
@@ -295,19 +368,10 @@ def button_handler(update: Update, context: CallbackContext):
 
 def process_completion(update, context, task_id, from_button=False):
     user = update.effective_user
-    cur.execute(
-        "SELECT completed FROM user_progress WHERE user_id = ? AND task_id = ?",
-        (user.id, task_id),
-    )
-    row = cur.fetchone()
-    if row and row[0] == 1:
+    if repo.is_completed(user.id, task_id):
         msg = "⚡ You’ve already completed this task!"
     else:
-        cur.execute(
-            "INSERT OR REPLACE INTO user_progress (user_id, task_id, completed) VALUES (?, ?, 0)",
-            (user.id, task_id),
-        )
-        conn.commit()
+        repo.mark_in_progress(user.id, task_id)
         msg = f"📝 Task #{task_id} 📂 marked as <b>in progress</b>!\n📸 Don’t forget to submit your proof to claim your points!"
     if from_button:
         update.callback_query.edit_message_text(msg)
@@ -316,11 +380,7 @@ def process_completion(update, context, task_id, from_button=False):
 
 
 def my_stats(update: Update, context: CallbackContext):
-    cur.execute(
-        "SELECT SUM(points) FROM user_progress WHERE user_id = ? AND completed = 1",
-        (update.effective_user.id,),
-    )
-    pts = cur.fetchone()[0] or 0
+    pts = repo.user_points(update.effective_user.id)
     update.message.reply_text(
         f"<b>📊 <b>Your Progress Summary</b></b>\n\n"
         f"🏅 Total Points: <b>{pts}</b>\n"
@@ -330,10 +390,7 @@ def my_stats(update: Update, context: CallbackContext):
 
 
 def leaderboard(update: Update, context: CallbackContext):
-    cur.execute(
-        "SELECT username, SUM(points) FROM user_progress WHERE completed = 1 GROUP BY user_id ORDER BY SUM(points) DESC LIMIT 10"
-    )
-    rows = cur.fetchall()
+    rows = repo.leaderboard(10)
     if not rows:
         update.message.reply_text("🏁 No one has earned any points yet.\nBe the first to make it to the leaderboard! 🚀")
         return
@@ -345,10 +402,12 @@ def leaderboard(update: Update, context: CallbackContext):
 
 
 def complete_task(update: Update, context: CallbackContext):
-    if not context.args:
-        update.message.reply_text("📘 Usage: <code>/complete_task [task_id]</code>")
+    try:
+        task_id = int(context.args[0])
+    except (IndexError, ValueError):
+        update.message.reply_text("📘 Usage: <code>/complete_task [task_id]</code>", parse_mode="HTML")
         return
-    process_completion(update, context, int(context.args[0]), False)
+    process_completion(update, context, task_id, False)
 
 
 # -------------------------------------------------
@@ -379,9 +438,14 @@ def main():
 
     dp = updater.dispatcher
 
+    dp.add_handler(TypeHandler(Update, throttle), group=-1)
     dp.add_handler(CommandHandler("start", start))
     dp.add_handler(CommandHandler("add_task", add_task))
     dp.add_handler(CommandHandler("remove_task", remove_task))
+    dp.add_handler(CommandHandler("broadcast", broadcast_cmd))
+    dp.add_handler(CommandHandler("announce_task", announce_task))
+    dp.add_handler(CommandHandler("broadcast_status", broadcast_status))
+    dp.add_handler(CommandHandler("rate_stats", rate_stats))
     dp.add_handler(CommandHandler("list_tasks", list_tasks))
     dp.add_handler(CommandHandler("my_stats", my_stats))
     dp.add_handler(CommandHandler("leaderboard", leaderboard))
@@ -390,6 +454,10 @@ def main():
     dp.add_handler(CallbackQueryHandler(button_handler))
     dp.add_handler(MessageHandler(Filters.photo, handle_photo))
 
+    if isinstance(repo, SQLiteRepository):
+        schedule_maintenance(updater.job_queue, DB_PATH)
+    broadcast.schedule_broadcasts(updater.job_queue, DB_PATH)
+
     keep_alive()
 
     webhook_url = os.getenv("RENDER_EXTERNAL_URL")
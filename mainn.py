@@ -1,6 +1,5 @@
 import os
 import logging
-import sqlite3
 from html import escape
 import asyncio
 
@@ -13,9 +12,13 @@ from telegram.ext import (
     CallbackQueryHandler,
     ContextTypes,
     filters,
+    TypeHandler,
+    ApplicationHandlerStop,
 )
 
 from keep_alive import keep_alive
+from ratelimit import RateLimiter, update_command
+from storage import open_repository
 
 # -------------------------------------------------
 # CONFIG
@@ -36,35 +39,27 @@ ADMIN_IDS = {5002083764, 1835452655, 5838038047, 2112909022}
 # DATABASE
 # -------------------------------------------------
 DB_PATH = "tasks.db"
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-cur = conn.cursor()
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS tasks (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    niche TEXT,
-    platform TEXT,
-    name TEXT NOT NULL,
-    points INTEGER NOT NULL,
-    url TEXT DEFAULT NULL
-)
-""")
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS user_progress (
-    user_id INTEGER,
-    username TEXT,
-    task_id INTEGER,
-    completed INTEGER DEFAULT 0,
-    points INTEGER DEFAULT 0,
-    proof TEXT DEFAULT NULL
-)
-""")
-conn.commit()
+repo = open_repository(DB_PATH)
 
 # -------------------------------------------------
 # HANDLERS
 # -------------------------------------------------
+rate_limiter = RateLimiter()
+
+async def throttle(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    if not user or user.id in ADMIN_IDS:
+        return
+    if not rate_limiter.allow(user.id, update_command(update)):
+        raise ApplicationHandlerStop()
+
+async def rate_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    stats = rate_limiter.stats()
+    shed = "\n".join(f"{k}: {v}" for k, v in sorted(stats["shed"].items())) or "none"
+    await update.message.reply_text(f"Active buckets: {stats['buckets']}\nShed updates:\n{shed}")
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = (
         "<b>Welcome to Crypto Growth Bot!</b>\n\n"
@@ -90,10 +85,8 @@ async def add_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
     niche, platform = context.args[0], context.args[1]
     name = " ".join(context.args[2:-2])
     url, points = context.args[-2], int(context.args[-1])
-    cur.execute("INSERT INTO tasks (niche, platform, name, points, url) VALUES (?, ?, ?, ?, ?)",
-                (niche, platform, name, points, url))
-    conn.commit()
-    await update.message.reply_text(f"Task #{cur.lastrowid} added!")
+    task_id = repo.add_task(niche, platform, name, points, url)
+    await update.message.reply_text(f"Task #{task_id} added!")
 
 async def remove_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id not in ADMIN_IDS:
@@ -103,18 +96,17 @@ async def remove_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Usage: /remove_task [task_id]")
         return
     task_id = int(context.args[0])
-    cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-    conn.commit()
+    repo.remove_task(task_id)
     await update.message.reply_text(f"Task #{task_id} removed.")
 
 async def list_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     niche = context.args[0] if context.args else "crypto"
-    cur.execute("SELECT id, platform, name, points, url FROM tasks WHERE niche = ?", (niche,))
-    rows = cur.fetchall()
-    if not rows:
+    tasks = repo.list_tasks(niche)
+    if not tasks:
         await update.message.reply_text(f"No tasks in {niche}")
         return
-    for tid, plat, name, pts, url in rows:
+    for task in tasks:
+        tid, plat, name, pts, url = task.id, task.platform, task.name, task.points, task.url
         btns = [
             [InlineKeyboardButton(f"Complete #{tid}", callback_data=f"complete_{tid}")],
             [InlineKeyboardButton("Submit Proof", callback_data=f"proof_{tid}")]
@@ -141,22 +133,21 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     task_id = proof_waiting.pop(user_id)
     file_id = update.message.photo[-1].file_id
-    cur.execute(
-        "INSERT OR REPLACE INTO user_progress (user_id, task_id, proof, completed) VALUES (?, ?, ?, 0)",
-        (user_id, task_id, file_id)
-    )
-    conn.commit()
+    if not repo.submit_proof(user_id, task_id, file_id):
+        await update.message.reply_text("Already completed!")
+        return
     await update.message.reply_text("Proof submitted!")
 
 async def review_proofs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id not in ADMIN_IDS:
         return
-    cur.execute("SELECT user_id, task_id, proof FROM user_progress WHERE proof IS NOT NULL AND completed = 0")
-    rows = cur.fetchall()
+    rows = repo.claim_proofs(update.effective_user.id)
     if not rows:
-        await update.message.reply_text("No proofs.")
+        held = repo.held_proofs(update.effective_user.id)
+        await update.message.reply_text(f"No new proofs. You still hold {held}." if held else "No proofs.")
         return
-    for uid, tid, fid in rows:
+    for proof in rows:
+        uid, tid, fid = proof.user_id, proof.task_id, proof.file_id
         await context.bot.send_photo(
             update.effective_chat.id,
             fid,
@@ -177,32 +168,28 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await ask_proof(update, context, int(data.split("_")[1]))
     elif data.startswith("remove_") and update.effective_user.id in ADMIN_IDS:
         tid = int(data.split("_")[1])
-        cur.execute("DELETE FROM tasks WHERE id = ?", (tid,))
-        conn.commit()
+        repo.remove_task(tid)
         await q.edit_message_text(f"Task #{tid} removed.")
-    elif data.startswith("approve_"):
+    elif data.startswith("approve_") and update.effective_user.id in ADMIN_IDS:
         _, uid, tid = data.split("_")
-        uid, tid = int(uid), int(tid)
-        cur.execute("SELECT points FROM tasks WHERE id = ?", (tid,))
-        pts = cur.fetchone()[0]
-        cur.execute("UPDATE user_progress SET completed = 1, points = ? WHERE user_id = ? AND task_id = ?", (pts, uid, tid))
-        conn.commit()
+        pts = repo.approve_proof(update.effective_user.id, int(uid), int(tid))
+        if pts is None:
+            await q.edit_message_caption("Already handled or task removed.")
+            return
         await q.edit_message_caption(caption=f"Approved! +{pts} pts")
-    elif data.startswith("reject_"):
+    elif data.startswith("reject_") and update.effective_user.id in ADMIN_IDS:
         _, uid, tid = data.split("_")
-        cur.execute("DELETE FROM user_progress WHERE user_id = ? AND task_id = ?", (int(uid), int(tid)))
-        conn.commit()
+        if not repo.reject_proof(update.effective_user.id, int(uid), int(tid)):
+            await q.edit_message_caption("Already handled.")
+            return
         await q.edit_message_caption("Rejected.")
 
 async def process_completion(update, context, task_id, from_button=False):
     user = update.effective_user
-    cur.execute("SELECT completed FROM user_progress WHERE user_id = ? AND task_id = ?", (user.id, task_id))
-    row = cur.fetchone()
-    if row and row[0] == 1:
+    if repo.is_completed(user.id, task_id):
         msg = "Already completed!"
     else:
-        cur.execute("INSERT OR REPLACE INTO user_progress (user_id, task_id, completed) VALUES (?, ?, 0)", (user.id, task_id))
-        conn.commit()
+        repo.mark_in_progress(user.id, task_id)
         msg = f"Task #{task_id} in progress. Submit proof!"
     if from_button:
         await update.callback_query.edit_message_text(msg)
@@ -210,19 +197,25 @@ async def process_completion(update, context, task_id, from_button=False):
         await update.message.reply_text(msg)
 
 async def my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    cur.execute("SELECT SUM(points) FROM user_progress WHERE user_id = ? AND completed = 1", (update.effective_user.id,))
-    pts = cur.fetchone()[0] or 0
+    pts = repo.user_points(update.effective_user.id)
     await update.message.reply_text(f"Your points: {pts}")
 
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    cur.execute("SELECT username, SUM(points) FROM user_progress WHERE completed = 1 GROUP BY user_id ORDER BY SUM(points) DESC LIMIT 10")
-    rows = cur.fetchall()
+    rows = repo.leaderboard(10)
     if not rows:
         await update.message.reply_text("No data.")
         return
     text = "<b>Leaderboard</b>\n" + "\n".join(f"{i+1}. @{r[0] or 'User'} — {r[1]} pts" for i, r in enumerate(rows))
     await update.message.reply_text(text, parse_mode="HTML")
 
+async def complete_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        task_id = int(context.args[0])
+    except (IndexError, ValueError):
+        await update.message.reply_text("Usage: /complete_task [task_id]")
+        return
+    await process_completion(update, context, task_id)
+
 # -------------------------------------------------
 # FLASK + WEBHOOK
 # -------------------------------------------------
@@ -245,6 +238,7 @@ def webhook():
 # -------------------------------------------------
 application = ApplicationBuilder().token(BOT_TOKEN).build()
 
+application.add_handler(TypeHandler(Update, throttle), group=-1)
 application.add_handler(CommandHandler("start", start))
 application.add_handler(CommandHandler("add_task", add_task))
 application.add_handler(CommandHandler("remove_task", remove_task))
@@ -252,7 +246,8 @@ application.add_handler(CommandHandler("list_tasks", list_tasks))
 application.add_handler(CommandHandler("my_stats", my_stats))
 application.add_handler(CommandHandler("leaderboard", leaderboard))
 application.add_handler(CommandHandler("review_proofs", review_proofs))
-application.add_handler(CommandHandler("complete_task", lambda u, c: process_completion(u, c, int(c.args[0]) if c.args else None)))
+application.add_handler(CommandHandler("rate_stats", rate_stats))
+application.add_handler(CommandHandler("complete_task", complete_task))
 application.add_handler(CallbackQueryHandler(button_handler))
 application.add_handler(MessageHandler(filters.PHOTO, handle_photo))
 
@@ -0,0 +1,103 @@
+# maintenance.py
+import os
+import logging
+import time
+from datetime import time as dtime, timezone
+
+from storage import SQLiteRepository
+
+logger = logging.getLogger("GrowTogether.maintenance")
+
+MAINTENANCE_HOUR = int(os.getenv("MAINTENANCE_HOUR", 4))   # UTC, off-peak
+VACUUM_PAGES = int(os.getenv("MAINTENANCE_VACUUM_PAGES", 2000))
+ANALYSIS_LIMIT = int(os.getenv("MAINTENANCE_ANALYSIS_LIMIT", 1000))   # rows sampled per index
+
+
+def table_sizes(conn):
+    """
+    Row counts per table plus the database file size in bytes. Counts come
+    from sqlite_stat1, so call this right after ANALYZE. With analysis_limit
+    set they are estimates, but neither step scans the ever-growing archive.
+    """
+    cur = conn.cursor()
+    sizes = dict.fromkeys(("tasks", "user_progress", "user_progress_archive", "user_totals"), 0)
+    for table, stat in cur.execute("SELECT tbl, stat FROM sqlite_stat1"):
+        if table in sizes:
+            sizes[table] = max(sizes[table], int(stat.split()[0]))
+    page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+    page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+    freelist = cur.execute("PRAGMA freelist_count").fetchone()[0]
+    sizes["db_bytes"] = page_count * page_size
+    sizes["free_bytes"] = freelist * page_size
+    return sizes
+
+
+def run_maintenance(db_path):
+    """
+    One maintenance pass: archive, ANALYZE, incremental VACUUM, WAL checkpoint.
+    Uses its own connection so it never holds the handlers' repository lock.
+    Returns a report dict with table sizes and seconds spent per step.
+    """
+    repo = SQLiteRepository(db_path)
+    conn = repo.conn
+    timings = {}
+    try:
+        start = time.monotonic()
+        moved = repo.archive_finalized()
+        timings["archive"] = time.monotonic() - start
+
+        start = time.monotonic()
+        # Sample each index instead of reading the whole archive every night.
+        conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        conn.execute("ANALYZE")
+        timings["analyze"] = time.monotonic() - start
+
+        start = time.monotonic()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Switching to INCREMENTAL only takes effect after one full VACUUM.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # execute() steps this pragma once, freeing a single page;
+            # executescript() runs it to completion.
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});")
+        timings["vacuum"] = time.monotonic() - start
+
+        start = time.monotonic()
+        # (busy, wal pages, pages checkpointed); busy=1 means an open reader
+        # kept the WAL from being truncated.
+        checkpoint = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        timings["checkpoint"] = time.monotonic() - start
+
+        report = {
+            "archived": moved,
+            "sizes": table_sizes(conn),
+            "checkpoint": dict(zip(("busy", "log", "checkpointed"), checkpoint)),
+            "timings": timings,
+        }
+    finally:
+        repo.close()
+
+    logger.info(
+        "Maintenance done: archived=%d sizes=%s checkpoint=%s timings=%s total=%.3fs",
+        report["archived"], report["sizes"], report["checkpoint"],
+        {k: round(v, 3) for k, v in timings.items()}, sum(timings.values()),
+    )
+    if report["checkpoint"]["busy"]:
+        logger.warning("WAL checkpoint was blocked by an open reader; WAL not truncated")
+    return report
+
+
+def schedule_maintenance(job_queue, db_path):
+    """Register the daily maintenance job on a PTB JobQueue."""
+    def _job(context):
+        try:
+            run_maintenance(db_path)
+        except Exception:
+            logger.exception("Maintenance run failed")
+
+    job_queue.run_daily(
+        _job,
+        time=dtime(hour=MAINTENANCE_HOUR, tzinfo=timezone.utc),
+        name="db_maintenance",
+    )
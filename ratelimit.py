@@ -0,0 +1,79 @@
+# ratelimit.py
+import time
+import threading
+from collections import OrderedDict, Counter
+
+# (burst, refill per second). Every update draws from the user's bucket;
+# the commands below also draw from their own, stricter bucket.
+USER_LIMIT = (20, 1.0)
+COMMAND_LIMITS = {
+    "complete": (5, 0.5),
+    "leaderboard": (3, 0.2),
+}
+# /complete_task and the complete_ button share one bucket.
+COMMAND_ALIASES = {"complete_task": "complete"}
+
+MAX_BUCKETS = 10000   # least recently used buckets are evicted past this
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by (user_id, key) in a bounded LRU dict.
+    Each bucket is a two-item list [tokens, last_refill] to keep it small.
+    """
+
+    def __init__(self, max_buckets=MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self.shed = Counter()
+        self.lock = threading.Lock()
+
+    def _refill(self, key, burst, rate, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = [burst, now]
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    def allow(self, user_id, command=None, now=None):
+        """
+        True if the update may proceed; counts it as shed otherwise.
+        A token is taken only when every bucket involved has one, so an
+        update shed by its command bucket doesn't cost a user token.
+        """
+        now = time.monotonic() if now is None else now
+        command = COMMAND_ALIASES.get(command, command)
+        with self.lock:
+            buckets = [self._refill((user_id, None), *USER_LIMIT, now)]
+            if buckets[0][0] < 1:
+                self.shed["user"] += 1
+                return False
+            if command in COMMAND_LIMITS:
+                buckets.append(self._refill((user_id, command), *COMMAND_LIMITS[command], now))
+                if buckets[1][0] < 1:
+                    self.shed[command] += 1
+                    return False
+            for bucket in buckets:
+                bucket[0] -= 1
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {"buckets": len(self.buckets), "shed": dict(self.shed)}
+
+
+def update_command(update):
+    """Command name or callback prefix of an update, without touching the DB."""
+    if update.callback_query and update.callback_query.data:
+        return update.callback_query.data.split("_", 1)[0]
+    message = update.effective_message
+    if message and message.text and message.text.startswith("/"):
+        parts = message.text[1:].split(None, 1)
+        if parts:
+            return parts[0].split("@", 1)[0].lower()
+    return None
@@ -0,0 +1,24 @@
+# storage/__init__.py
+import os
+
+from .base import Repository, Task, Proof, REVIEW_BATCH, LEASE_SECONDS
+from .sqlite import SQLiteRepository
+from .memory import MemoryRepository
+
+__all__ = [
+    "Repository", "Task", "Proof", "REVIEW_BATCH", "LEASE_SECONDS",
+    "SQLiteRepository", "MemoryRepository", "open_repository",
+]
+
+
+def open_repository(db_path="tasks.db", backend=None):
+    """
+    Build the configured backend. STORAGE_BACKEND=memory swaps SQLite out,
+    e.g. for local runs and benchmarks.
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "sqlite")).lower()
+    if backend == "memory":
+        return MemoryRepository()
+    if backend == "sqlite":
+        return SQLiteRepository(db_path)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,116 @@
+# storage/base.py
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+REVIEW_BATCH = int(os.getenv("REVIEW_BATCH", 10))
+LEASE_SECONDS = int(os.getenv("REVIEW_LEASE_SECONDS", 600))   # 10 min
+
+
+@dataclass(frozen=True)
+class Task:
+    id: int
+    niche: Optional[str]
+    platform: Optional[str]
+    name: str
+    points: int
+    url: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Proof:
+    user_id: int
+    task_id: int
+    file_id: str
+
+
+class Repository(ABC):
+    """
+    Data access for the bot: tasks, progress, proofs and point totals.
+    There is one progress entry per (user_id, task_id). Approved entries
+    may be archived, but they still count as completed and keep their points.
+    """
+
+    # --- tasks ---
+    @abstractmethod
+    def add_task(self, niche: str, platform: str, name: str, points: int, url: Optional[str]) -> int:
+        """Create a task and return its id."""
+
+    @abstractmethod
+    def remove_task(self, task_id: int) -> None:
+        ...
+
+    @abstractmethod
+    def get_task(self, task_id: int) -> Optional[Task]:
+        ...
+
+    @abstractmethod
+    def list_tasks(self, niche: str) -> List[Task]:
+        ...
+
+    # --- progress ---
+    @abstractmethod
+    def is_completed(self, user_id: int, task_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def mark_in_progress(self, user_id: int, task_id: int) -> None:
+        """Start a task unless the user already has an entry for it."""
+
+    @abstractmethod
+    def submit_proof(self, user_id: int, task_id: int, file_id: str) -> bool:
+        """Attach a proof for review. False if the task is already completed."""
+
+    # --- proofs ---
+    @abstractmethod
+    def claim_proofs(self, admin_id: int, limit: int = REVIEW_BATCH,
+                     lease_seconds: int = LEASE_SECONDS, now: Optional[int] = None) -> List[Proof]:
+        """
+        Lease up to `limit` more pending proofs to one admin and return only
+        those. Live leases are left alone, so calling it again gives the next
+        batch. Unclaimed proofs and expired leases, including the admin's
+        own, are up for grabs.
+        """
+
+    @abstractmethod
+    def held_proofs(self, admin_id: int, now: Optional[int] = None) -> int:
+        """How many pending proofs the admin holds a live lease on."""
+
+    @abstractmethod
+    def approve_proof(self, admin_id: int, user_id: int, task_id: int,
+                      now: Optional[int] = None) -> Optional[int]:
+        """
+        Approve a pending proof that is not leased to another admin.
+        Returns the points awarded, or None if it was handled already or the
+        task is gone.
+        """
+
+    @abstractmethod
+    def reject_proof(self, admin_id: int, user_id: int, task_id: int,
+                     now: Optional[int] = None) -> bool:
+        """Drop a pending proof under the same rules as approve_proof()."""
+
+    # --- totals ---
+    @abstractmethod
+    def user_points(self, user_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def leaderboard(self, limit: int = 10) -> List[Tuple[Optional[str], int]]:
+        """
+        [(username, points), ...] best first. The username is None when the
+        backend has none stored for that user.
+        """
+
+    @abstractmethod
+    def known_user_ids(self) -> List[int]:
+        """Every user that has ever started a task."""
+
+    # --- housekeeping ---
+    @abstractmethod
+    def archive_finalized(self) -> int:
+        """Move approved entries to cold storage. Returns how many moved."""
+
+    def close(self) -> None:
+        pass
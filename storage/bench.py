@@ -0,0 +1,57 @@
+# storage/bench.py
+"""
+Time the repository calls the handlers make, without Telegram.
+
+    python -m storage.bench [users] [tasks]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from . import SQLiteRepository, MemoryRepository
+
+
+def _timed(label, fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<18} {n:>7} ops  {elapsed * 1000:9.1f} ms  {elapsed / n * 1e6:8.1f} us/op")
+
+
+def run(repo, users=1000, tasks=20):
+    task_ids = [repo.add_task("crypto", "x", f"task {i}", 10, None) for i in range(tasks)]
+    n = users * tasks
+
+    def pick(i):
+        # Every i < n maps to its own (user, task) pair.
+        return 1000 + i // tasks, task_ids[i % tasks]
+
+    _timed("submit_proof", lambda i: repo.submit_proof(*pick(i), f"file{i}"), n)
+    claimed = []
+    _timed("claim_proofs", lambda i: claimed.extend(repo.claim_proofs(1, limit=50)), -(-n // 50))
+    assert len(claimed) == n, "each claim should lease a fresh batch"
+    _timed("approve_proof", lambda i: repo.approve_proof(1, claimed[i].user_id, claimed[i].task_id), n)
+    _timed("is_completed", lambda i: repo.is_completed(*pick(i)), n)
+    _timed("user_points", lambda i: repo.user_points(1000 + i % users), n)
+    _timed("leaderboard", lambda i: repo.leaderboard(), 200)
+    _timed("list_tasks", lambda i: repo.list_tasks("crypto"), 200)
+    _timed("archive_finalized", lambda i: repo.archive_finalized(), 1)
+    _timed("leaderboard (cold)", lambda i: repo.leaderboard(), 200)
+
+
+def main(argv):
+    users = int(argv[1]) if len(argv) > 1 else 1000
+    tasks = int(argv[2]) if len(argv) > 2 else 20
+    print("memory:")
+    run(MemoryRepository(), users, tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        print("sqlite:")
+        repo = SQLiteRepository(os.path.join(tmp, "bench.db"))
+        run(repo, users, tasks)
+        repo.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,193 @@
+# storage/memory.py
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .base import Repository, Task, Proof, REVIEW_BATCH, LEASE_SECONDS
+
+
+class _Entry:
+    __slots__ = ("seq", "completed", "points", "proof", "claimed_by", "claim_expires")
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.completed = False
+        self.points = 0
+        self.proof = None
+        self.claimed_by = None
+        self.claim_expires = 0
+
+
+class MemoryRepository(Repository):
+    """
+    In-process backend for tests, benchmarks and throwaway deployments.
+    Keeps a dict index for every lookup the bot makes. Nothing survives a
+    restart.
+
+    - progress: (user_id, task_id) -> _Entry
+    - pending:  (user_id, task_id) awaiting review
+    - queue:    heap of (entry seq, key) over unleased pending proofs, so a
+                claim pops in entry creation order (SQLite's rowid order) and
+                stops after `limit`
+    - leased:   heap of (expires, seq, key, admin_id); expired leases move
+                back to `queue` at the start of each claim
+    Stale heap items (decided, resubmitted or re-leased) are dropped when
+    they surface.
+    - leases:   admin_id -> keys they claimed, pruned lazily in held_proofs()
+    - totals:   user_id -> points, updated on approve, so /my_stats is O(1)
+
+    No usernames are kept, since the Repository API never receives one, so
+    leaderboard() always reports None for the name.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self.tasks: Dict[int, Task] = {}
+        self.by_niche: Dict[str, Dict[int, None]] = {}
+        self.progress: Dict[Tuple[int, int], _Entry] = {}
+        self.pending: Dict[Tuple[int, int], None] = {}
+        self.queue: List[Tuple[int, Tuple[int, int]]] = []
+        self.leased: List[Tuple[int, int, Tuple[int, int], int]] = []
+        self.leases: Dict[int, Dict[Tuple[int, int], None]] = {}
+        self.archived: Dict[Tuple[int, int], int] = {}
+        self.totals: Dict[int, int] = {}
+
+    # --- tasks ---
+    def add_task(self, niche, platform, name, points, url):
+        with self.lock:
+            task = Task(next(self._ids), niche, platform, name, points, url)
+            self.tasks[task.id] = task
+            self.by_niche.setdefault(niche, {})[task.id] = None
+            return task.id
+
+    def remove_task(self, task_id):
+        with self.lock:
+            task = self.tasks.pop(task_id, None)
+            if task:
+                self.by_niche.get(task.niche, {}).pop(task_id, None)
+
+    def get_task(self, task_id) -> Optional[Task]:
+        return self.tasks.get(task_id)
+
+    def list_tasks(self, niche) -> List[Task]:
+        with self.lock:
+            return [self.tasks[tid] for tid in self.by_niche.get(niche, ())]
+
+    # --- progress ---
+    def is_completed(self, user_id, task_id):
+        key = (user_id, task_id)
+        entry = self.progress.get(key)
+        return key in self.archived or bool(entry and entry.completed)
+
+    def mark_in_progress(self, user_id, task_id):
+        with self.lock:
+            key = (user_id, task_id)
+            if key not in self.progress and key not in self.archived:
+                self.progress[key] = _Entry(next(self._seq))
+
+    def submit_proof(self, user_id, task_id, file_id):
+        with self.lock:
+            key = (user_id, task_id)
+            if self.is_completed(user_id, task_id):
+                return False
+            entry = self.progress.get(key)
+            if entry is None:
+                entry = self.progress[key] = _Entry(next(self._seq))
+            entry.proof = file_id
+            if key not in self.pending or entry.claimed_by is not None:
+                # New, or leased: either way it is back in the free queue.
+                self.pending[key] = None
+                heapq.heappush(self.queue, (entry.seq, key))
+            entry.claimed_by, entry.claim_expires = None, 0
+            return True
+
+    # --- proofs ---
+    def _free_or_mine(self, entry, admin_id, now):
+        return entry.claimed_by is None or entry.claim_expires < now or entry.claimed_by == admin_id
+
+    def claim_proofs(self, admin_id, limit=REVIEW_BATCH, lease_seconds=LEASE_SECONDS, now=None) -> List[Proof]:
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            while self.leased and self.leased[0][0] < now:
+                expires, seq, key, holder = heapq.heappop(self.leased)
+                entry = self.progress.get(key)
+                if (key in self.pending and entry.seq == seq
+                        and entry.claimed_by == holder and entry.claim_expires == expires):
+                    # An expired lease is the same as none; clearing it keeps
+                    # "in queue" equal to "pending and unleased".
+                    entry.claimed_by, entry.claim_expires = None, 0
+                    heapq.heappush(self.queue, (seq, key))
+
+            claimed = []
+            while self.queue and len(claimed) < limit:
+                seq, key = heapq.heappop(self.queue)
+                entry = self.progress.get(key)
+                if key in self.pending and entry.seq == seq:
+                    claimed.append(key)
+
+            held = self.leases.setdefault(admin_id, {})
+            expires = now + lease_seconds
+            for key in claimed:
+                entry = self.progress[key]
+                entry.claimed_by, entry.claim_expires = admin_id, expires
+                held[key] = None
+                heapq.heappush(self.leased, (expires, entry.seq, key, admin_id))
+            return [Proof(uid, tid, self.progress[(uid, tid)].proof) for uid, tid in claimed]
+
+    def held_proofs(self, admin_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            held = self.leases.get(admin_id, {})
+            for key in list(held):
+                entry = self.progress.get(key)
+                if key not in self.pending or entry.claimed_by != admin_id or entry.claim_expires < now:
+                    del held[key]
+            return len(held)
+
+    def approve_proof(self, admin_id, user_id, task_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            key = (user_id, task_id)
+            task = self.tasks.get(task_id)
+            entry = self.progress.get(key)
+            if not task or key not in self.pending or not self._free_or_mine(entry, admin_id, now):
+                return None
+            del self.pending[key]
+            entry.completed, entry.points, entry.claimed_by = True, task.points, None
+            self.totals[user_id] = self.totals.get(user_id, 0) + task.points
+            return task.points
+
+    def reject_proof(self, admin_id, user_id, task_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            key = (user_id, task_id)
+            if key not in self.pending or not self._free_or_mine(self.progress[key], admin_id, now):
+                return False
+            del self.pending[key]
+            del self.progress[key]
+            return True
+
+    # --- totals ---
+    def user_points(self, user_id):
+        return self.totals.get(user_id, 0)
+
+    def leaderboard(self, limit=10) -> List[Tuple[Optional[str], int]]:
+        with self.lock:
+            top = heapq.nlargest(limit, self.totals.items(), key=lambda item: item[1])
+            return [(None, pts) for _, pts in top]
+
+    def known_user_ids(self):
+        with self.lock:
+            return list({uid for uid, _ in self.progress} | set(self.totals))
+
+    # --- housekeeping ---
+    def archive_finalized(self):
+        with self.lock:
+            done = [key for key, entry in self.progress.items() if entry.completed]
+            for key in done:
+                self.archived[key] = self.progress.pop(key).points
+            return len(done)
@@ -0,0 +1,321 @@
+# storage/sqlite.py
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .base import Repository, Task, Proof, REVIEW_BATCH, LEASE_SECONDS
+
+# A pending proof is free when nobody holds it or the holder's lease ran out.
+_FREE = "(claimed_by IS NULL OR claim_expires < ?)"
+_FREE_OR_MINE = "(claimed_by IS NULL OR claim_expires < ? OR claimed_by = ?)"
+
+
+class SQLiteRepository(Repository):
+    """
+    SQLite backend. It runs in autocommit mode with explicit transactions, and
+    one lock serialises the PTB worker, webhook and job threads on the shared
+    connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30,
+            cached_statements=256,
+        )
+        self.lock = threading.RLock()
+        self._tune()
+        self._create_schema()
+
+    def _tune(self):
+        cur = self.conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")       # safe with WAL, far fewer fsyncs
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA cache_size=-8000")         # ~8 MB page cache
+        cur.execute("PRAGMA mmap_size=67108864")       # 64 MB
+        cur.execute("PRAGMA busy_timeout=30000")
+
+    def _create_schema(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            niche TEXT,
+            platform TEXT,
+            name TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            url TEXT DEFAULT NULL
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_progress (
+            user_id INTEGER,
+            username TEXT,
+            task_id INTEGER,
+            completed INTEGER DEFAULT 0,
+            points INTEGER DEFAULT 0,
+            proof TEXT DEFAULT NULL,
+            claimed_by INTEGER DEFAULT NULL,
+            claim_expires INTEGER DEFAULT 0
+        )
+        """)
+        # Databases created before proof leases lack these columns.
+        columns = {row[1] for row in cur.execute("PRAGMA table_info(user_progress)")}
+        if "claimed_by" not in columns:
+            cur.execute("ALTER TABLE user_progress ADD COLUMN claimed_by INTEGER DEFAULT NULL")
+        if "claim_expires" not in columns:
+            cur.execute("ALTER TABLE user_progress ADD COLUMN claim_expires INTEGER DEFAULT 0")
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_progress_archive (
+            user_id INTEGER,
+            username TEXT,
+            task_id INTEGER,
+            points INTEGER DEFAULT 0,
+            proof TEXT DEFAULT NULL,
+            archived_at INTEGER
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_totals (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            points INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_niche ON tasks (niche)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_archive_user_task ON user_progress_archive (user_id, task_id)")
+        if not cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_progress_user_task'"
+        ).fetchone():
+            self._collapse_duplicates()
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_progress_pending
+        ON user_progress (claim_expires) WHERE completed = 0 AND proof IS NOT NULL
+        """)
+
+    def _collapse_duplicates(self):
+        """
+        Older builds used INSERT OR REPLACE without a unique key, so one
+        (user_id, task_id) could have several rows. Keep the most final one
+        (completed, then with a proof, then newest) and enforce uniqueness.
+        """
+        with self._transaction() as cur:
+            cur.execute("""
+            DELETE FROM user_progress WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, ROW_NUMBER() OVER (
+                        PARTITION BY user_id, task_id
+                        ORDER BY completed DESC, proof IS NOT NULL DESC, rowid DESC
+                    ) AS rn
+                    FROM user_progress
+                ) WHERE rn > 1
+            )
+            """)
+            # Duplicates that were already archived inflated user_totals too.
+            cur.execute("""
+            DELETE FROM user_progress_archive WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, ROW_NUMBER() OVER (PARTITION BY user_id, task_id ORDER BY rowid) AS rn
+                    FROM user_progress_archive
+                ) WHERE rn > 1
+            )
+            """)
+            if cur.rowcount:
+                cur.execute("DELETE FROM user_totals")
+                cur.execute("""
+                INSERT INTO user_totals (user_id, username, points)
+                SELECT user_id, MAX(username), SUM(points) FROM user_progress_archive GROUP BY user_id
+                """)
+            cur.execute("DROP INDEX IF EXISTS idx_progress_user_task")
+            cur.execute("CREATE UNIQUE INDEX uq_progress_user_task ON user_progress (user_id, task_id)")
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    # --- tasks ---
+    def add_task(self, niche, platform, name, points, url):
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO tasks (niche, platform, name, points, url) VALUES (?, ?, ?, ?, ?)",
+                (niche, platform, name, points, url),
+            )
+            return cur.lastrowid
+
+    def remove_task(self, task_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def get_task(self, task_id) -> Optional[Task]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, niche, platform, name, points, url FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return Task(*row) if row else None
+
+    def list_tasks(self, niche) -> List[Task]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, niche, platform, name, points, url FROM tasks WHERE niche = ? ORDER BY id", (niche,)
+            ).fetchall()
+        return [Task(*row) for row in rows]
+
+    # --- progress ---
+    def is_completed(self, user_id, task_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM user_progress WHERE user_id = ? AND task_id = ? AND completed = 1) "
+                "OR EXISTS (SELECT 1 FROM user_progress_archive WHERE user_id = ? AND task_id = ?)",
+                (user_id, task_id, user_id, task_id),
+            ).fetchone()
+        return bool(row[0])
+
+    def mark_in_progress(self, user_id, task_id):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO user_progress (user_id, task_id, completed) "
+                "SELECT ?, ?, 0 WHERE NOT EXISTS "
+                "(SELECT 1 FROM user_progress_archive WHERE user_id = ? AND task_id = ?) "
+                "ON CONFLICT(user_id, task_id) DO NOTHING",
+                (user_id, task_id, user_id, task_id),
+            )
+
+    def submit_proof(self, user_id, task_id, file_id):
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO user_progress (user_id, task_id, proof, completed) "
+                "SELECT ?, ?, ?, 0 WHERE NOT EXISTS "
+                "(SELECT 1 FROM user_progress_archive WHERE user_id = ? AND task_id = ?) "
+                "ON CONFLICT(user_id, task_id) DO UPDATE SET "
+                "proof = excluded.proof, claimed_by = NULL, claim_expires = 0 "
+                "WHERE completed = 0",
+                (user_id, task_id, file_id, user_id, task_id),
+            )
+            return cur.rowcount > 0
+
+    # --- proofs ---
+    def claim_proofs(self, admin_id, limit=REVIEW_BATCH, lease_seconds=LEASE_SECONDS, now=None) -> List[Proof]:
+        now = int(time.time()) if now is None else now
+        with self._transaction() as cur:
+            cur.execute(
+                f"SELECT rowid, user_id, task_id, proof FROM user_progress "
+                f"WHERE completed = 0 AND proof IS NOT NULL AND {_FREE} ORDER BY rowid LIMIT ?",
+                (now, limit),
+            )
+            rows = cur.fetchall()
+            cur.executemany(
+                "UPDATE user_progress SET claimed_by = ?, claim_expires = ? WHERE rowid = ?",
+                ((admin_id, now + lease_seconds, row[0]) for row in rows),
+            )
+            return [Proof(*row[1:]) for row in rows]
+
+    def held_proofs(self, admin_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM user_progress "
+                "WHERE completed = 0 AND proof IS NOT NULL AND claimed_by = ? AND claim_expires >= ?",
+                (admin_id, now),
+            ).fetchone()
+        return row[0]
+
+    def approve_proof(self, admin_id, user_id, task_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self._transaction() as cur:
+            cur.execute("SELECT points FROM tasks WHERE id = ?", (task_id,))
+            row = cur.fetchone()
+            if not row:
+                return None
+            cur.execute(
+                f"""
+                UPDATE user_progress SET completed = 1, points = ?, claimed_by = NULL
+                WHERE user_id = ? AND task_id = ? AND completed = 0 AND proof IS NOT NULL
+                  AND {_FREE_OR_MINE}
+                """,
+                (row[0], user_id, task_id, now, admin_id),
+            )
+            return row[0] if cur.rowcount else None
+
+    def reject_proof(self, admin_id, user_id, task_id, now=None):
+        now = int(time.time()) if now is None else now
+        with self.lock:
+            cur = self.conn.execute(
+                f"""
+                DELETE FROM user_progress
+                WHERE user_id = ? AND task_id = ? AND completed = 0 AND proof IS NOT NULL
+                  AND {_FREE_OR_MINE}
+                """,
+                (user_id, task_id, now, admin_id),
+            )
+            return cur.rowcount > 0
+
+    # --- totals ---
+    def user_points(self, user_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COALESCE((SELECT points FROM user_totals WHERE user_id = ?), 0) + "
+                "COALESCE((SELECT SUM(points) FROM user_progress WHERE user_id = ? AND completed = 1), 0)",
+                (user_id, user_id),
+            ).fetchone()
+        return row[0]
+
+    def leaderboard(self, limit=10) -> List[Tuple[Optional[str], int]]:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT MAX(username), SUM(points) FROM ("
+                "SELECT user_id, username, points FROM user_totals "
+                "UNION ALL SELECT user_id, username, points FROM user_progress WHERE completed = 1"
+                ") GROUP BY user_id ORDER BY SUM(points) DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def known_user_ids(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT user_id FROM user_progress UNION SELECT user_id FROM user_totals"
+            ).fetchall()
+        return [row[0] for row in rows if row[0] is not None]
+
+    # --- housekeeping ---
+    def archive_finalized(self):
+        with self._transaction() as cur:
+            cur.execute("""
+            INSERT INTO user_totals (user_id, username, points)
+            SELECT user_id, MAX(username), SUM(points)
+            FROM user_progress WHERE completed = 1 GROUP BY user_id
+            ON CONFLICT(user_id) DO UPDATE SET
+                points = points + excluded.points,
+                username = COALESCE(excluded.username, username)
+            """)
+            cur.execute("""
+            INSERT INTO user_progress_archive (user_id, username, task_id, points, proof, archived_at)
+            SELECT user_id, username, task_id, points, proof, ?
+            FROM user_progress WHERE completed = 1
+            """, (int(time.time()),))
+            cur.execute("DELETE FROM user_progress WHERE completed = 1")
+            return cur.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class _Transaction:
+    """`with repo._transaction() as cur:` runs under BEGIN IMMEDIATE and the repo lock."""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    def __enter__(self):
+        self.repo.lock.acquire()
+        self.cur = self.repo.conn.cursor()
+        self.cur.execute("BEGIN IMMEDIATE")
+        return self.cur
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.cur.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.repo.lock.release()
+        return False
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("telegram")
+from telegram.error import BadRequest, NetworkError, Unauthorized
+
+import broadcast
+
+ADMIN = 999
+
+
+class FakeBot:
+    """Records sends; `errors` maps user_id to the exception to raise."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        error = self.errors.get(chat_id)
+        if error:
+            raise error
+        self.sent.append(chat_id)
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(broadcast, "BROADCAST_INTERVAL", 60.0)
+    conn = sqlite3.connect(":memory:")
+    broadcast.ensure_schema(conn)
+    yield conn
+    conn.close()
+
+
+def recipients(bot):
+    return [uid for uid in bot.sent if uid != ADMIN]
+
+
+def test_counters_and_done(conn):
+    bid, total = broadcast.start_broadcast(conn, "hi", ADMIN, range(1, 6))
+    assert total == 5
+    bot = FakeBot({2: Unauthorized("blocked"), 3: BadRequest("chat not found")})
+    broadcast._run_tick(bot, conn)
+
+    status = broadcast.broadcast_status(conn, bid)
+    assert status == {"id": bid, "status": "done", "total": 5, "sent": 3, "failed": 1, "blocked": 1}
+    assert recipients(bot) == [1, 4, 5]
+    assert bot.sent[-1] == ADMIN
+    assert conn.execute("SELECT COUNT(*) FROM broadcast_recipients").fetchone()[0] == 0
+
+
+def test_blocked_users_left_out_of_next_snapshot(conn):
+    broadcast.start_broadcast(conn, "one", ADMIN, [1, 2, 3])
+    broadcast._run_tick(FakeBot({2: Unauthorized("blocked")}), conn)
+
+    _, total = broadcast.start_broadcast(conn, "two", ADMIN, [1, 2, 3])
+    assert total == 2
+    bot = FakeBot()
+    broadcast._run_tick(bot, conn)
+    assert recipients(bot) == [1, 3]
+
+
+def test_resumes_from_cursor_after_exception(conn):
+    bid, _ = broadcast.start_broadcast(conn, "hi", ADMIN, range(1, 6))
+    bot = FakeBot({3: RuntimeError("crash")})
+    with pytest.raises(RuntimeError):
+        broadcast._run_tick(bot, conn)
+    assert conn.execute("SELECT cursor FROM broadcasts WHERE id = ?", (bid,)).fetchone()[0] == 2
+
+    del bot.errors[3]
+    broadcast._run_tick(bot, conn)
+    assert recipients(bot) == [1, 2, 3, 4, 5]
+    assert broadcast.broadcast_status(conn, bid)["sent"] == 5
+
+
+def test_gives_up_on_user_after_max_attempts(conn, monkeypatch):
+    monkeypatch.setattr(broadcast, "BROADCAST_MAX_ATTEMPTS", 3)
+    bid, _ = broadcast.start_broadcast(conn, "hi", ADMIN, [1, 2, 3])
+    bot = FakeBot({2: NetworkError("timed out")})
+
+    assert broadcast._run_tick(bot, conn) == broadcast.BROADCAST_BACKOFF
+    assert broadcast._run_tick(bot, conn) == broadcast.BROADCAST_BACKOFF
+    broadcast._run_tick(bot, conn)
+
+    status = broadcast.broadcast_status(conn, bid)
+    assert (status["status"], status["sent"], status["failed"]) == ("done", 2, 1)
+    assert recipients(bot) == [1, 3]
@@ -0,0 +1,38 @@
+import maintenance
+from storage import SQLiteRepository
+
+
+def test_incremental_vacuum_frees_configured_pages(tmp_path, monkeypatch):
+    path = str(tmp_path / "maint.db")
+    monkeypatch.setattr(maintenance, "VACUUM_PAGES", 50)
+    SQLiteRepository(path).close()
+    maintenance.run_maintenance(path)   # first run switches to auto_vacuum=INCREMENTAL
+
+    repo = SQLiteRepository(path)
+    task_id = repo.add_task("crypto", "x", "task", 10, None)
+    for user_id in range(20000):
+        repo.submit_proof(user_id, task_id, "f" * 100)
+    for user_id in range(20000):
+        repo.reject_proof(1, user_id, task_id)
+    page_size = repo.conn.execute("PRAGMA page_size").fetchone()[0]
+    repo.close()
+
+    first = maintenance.run_maintenance(path)["sizes"]["free_bytes"]
+    second = maintenance.run_maintenance(path)["sizes"]["free_bytes"]
+    assert first > 50 * page_size
+    assert first - second == 50 * page_size
+
+
+def test_report_includes_checkpoint_and_counts(tmp_path):
+    path = str(tmp_path / "maint.db")
+    repo = SQLiteRepository(path)
+    task_id = repo.add_task("crypto", "x", "task", 10, None)
+    repo.submit_proof(7, task_id, "f")
+    repo.approve_proof(1, 7, task_id)
+    repo.close()
+
+    report = maintenance.run_maintenance(path)
+    assert report["archived"] == 1
+    assert report["sizes"]["user_progress_archive"] == 1
+    assert report["sizes"]["user_totals"] == 1
+    assert set(report["checkpoint"]) == {"busy", "log", "checkpointed"}
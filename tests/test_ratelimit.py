@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import ratelimit
+from ratelimit import RateLimiter, update_command
+
+USER_BURST, USER_RATE = ratelimit.USER_LIMIT
+COMPLETE_BURST, COMPLETE_RATE = ratelimit.COMMAND_LIMITS["complete"]
+
+
+def drain(limiter, user_id, command=None, now=0.0):
+    allowed = 0
+    while limiter.allow(user_id, command, now=now):
+        allowed += 1
+    return allowed
+
+
+def test_user_bucket_refills():
+    limiter = RateLimiter()
+    assert drain(limiter, 1) == USER_BURST
+    assert not limiter.allow(1, now=0.5 / USER_RATE)
+    assert limiter.allow(1, now=1 / USER_RATE)
+    assert limiter.stats()["shed"]["user"] == 2
+
+
+def test_command_bucket_is_stricter_and_per_user():
+    limiter = RateLimiter()
+    assert drain(limiter, 1, "complete") == COMPLETE_BURST
+    assert limiter.allow(1, "list_tasks", now=0.0)
+    assert limiter.allow(2, "complete", now=0.0)
+    assert limiter.stats()["shed"] == {"complete": 1}
+
+
+def test_command_shed_does_not_cost_user_token():
+    limiter = RateLimiter()
+    drain(limiter, 1, "complete")
+    for _ in range(50):
+        assert not limiter.allow(1, "complete", now=0.0)
+    assert drain(limiter, 1) == USER_BURST - COMPLETE_BURST
+
+
+def test_complete_task_shares_complete_bucket():
+    limiter = RateLimiter()
+    for _ in range(COMPLETE_BURST):
+        assert limiter.allow(1, "complete_task", now=0.0)
+    assert not limiter.allow(1, "complete", now=0.0)
+
+
+def test_least_recently_used_bucket_is_evicted():
+    limiter = RateLimiter(max_buckets=2)
+    drain(limiter, 1)
+    limiter.allow(2, now=0.0)
+    limiter.allow(1, now=0.0)   # touch user 1 so user 2 is oldest
+    limiter.allow(3, now=0.0)
+    assert limiter.stats()["buckets"] == 2
+    assert (1, None) in limiter.buckets and (2, None) not in limiter.buckets
+    assert not limiter.allow(1, now=0.0)
+
+
+def _message(text):
+    return SimpleNamespace(callback_query=None, effective_message=SimpleNamespace(text=text))
+
+
+def test_update_command():
+    assert update_command(_message("/Complete_Task@GrowBot 3")) == "complete_task"
+    assert update_command(_message("/leaderboard")) == "leaderboard"
+    assert update_command(_message("/")) is None
+    assert update_command(_message("hello")) is None
+    callback = SimpleNamespace(callback_query=SimpleNamespace(data="complete_4"), effective_message=None)
+    assert update_command(callback) == "complete"
@@ -0,0 +1,84 @@
+import pytest
+
+from storage import MemoryRepository, SQLiteRepository
+
+NOW = 1_000_000
+LEASE = 600
+ALICE, BOB = 1, 2
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repo = MemoryRepository()
+    else:
+        repo = SQLiteRepository(str(tmp_path / "review.db"))
+    yield repo
+    repo.close()
+
+
+def submit(repo, count, points=10):
+    task_id = repo.add_task("crypto", "x", "task", points, None)
+    for user_id in range(100, 100 + count):
+        repo.submit_proof(user_id, task_id, f"file{user_id}")
+    return task_id
+
+
+def keys(proofs):
+    return [(p.user_id, p.task_id) for p in proofs]
+
+
+def test_repeat_claims_return_next_batch(repo):
+    submit(repo, 200)
+    batches = [keys(repo.claim_proofs(ALICE, limit=50, lease_seconds=LEASE, now=NOW)) for _ in range(4)]
+    seen = [key for batch in batches for key in batch]
+    assert all(len(batch) == 50 for batch in batches)
+    assert len(set(seen)) == 200
+    assert repo.held_proofs(ALICE, now=NOW) == 200
+    assert repo.claim_proofs(ALICE, limit=50, lease_seconds=LEASE, now=NOW) == []
+
+
+def test_two_admins_get_disjoint_batches(repo):
+    task_id = submit(repo, 10)
+    alice = keys(repo.claim_proofs(ALICE, limit=6, lease_seconds=LEASE, now=NOW))
+    bob = keys(repo.claim_proofs(BOB, limit=6, lease_seconds=LEASE, now=NOW))
+    assert len(alice) == 6 and len(bob) == 4
+    assert not set(alice) & set(bob)
+
+    user_id, _ = alice[0]
+    assert repo.approve_proof(BOB, user_id, task_id, now=NOW) is None
+    assert repo.reject_proof(BOB, user_id, task_id, now=NOW) is False
+    assert repo.approve_proof(ALICE, user_id, task_id, now=NOW) == 10
+    assert repo.approve_proof(ALICE, user_id, task_id, now=NOW) is None
+    assert repo.user_points(user_id) == 10
+    assert repo.held_proofs(ALICE, now=NOW) == 5
+
+
+def test_expired_lease_returns_to_pool(repo):
+    task_id = submit(repo, 3)
+    alice = keys(repo.claim_proofs(ALICE, limit=3, lease_seconds=LEASE, now=NOW))
+    later = NOW + LEASE + 1
+    assert repo.held_proofs(ALICE, now=later) == 0
+
+    bob = keys(repo.claim_proofs(BOB, limit=3, lease_seconds=LEASE, now=later))
+    assert bob == alice
+    user_id, _ = bob[0]
+    assert repo.approve_proof(ALICE, user_id, task_id, now=later) is None
+    assert repo.reject_proof(BOB, user_id, task_id, now=later) is True
+    assert repo.claim_proofs(ALICE, limit=3, lease_seconds=LEASE, now=later) == []
+
+
+def test_unclaimed_proof_can_be_decided_directly(repo):
+    task_id = submit(repo, 1, points=7)
+    assert repo.approve_proof(BOB, 100, task_id, now=NOW) == 7
+    assert repo.is_completed(100, task_id)
+
+
+def test_deleted_task_is_not_approved(repo):
+    task_id = submit(repo, 1)
+    repo.claim_proofs(ALICE, limit=1, lease_seconds=LEASE, now=NOW)
+    repo.remove_task(task_id)
+    assert repo.approve_proof(ALICE, 100, task_id, now=NOW) is None
+    assert repo.user_points(100) == 0
+    assert repo.reject_proof(ALICE, 100, task_id, now=NOW) is True
+    assert repo.held_proofs(ALICE, now=NOW) == 0
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from storage import MemoryRepository, SQLiteRepository
+
+
+def step(repo, op, user_id, task_id, admin_id, now):
+    if op == "mark":
+        return repo.mark_in_progress(user_id, task_id)
+    if op == "submit":
+        return repo.submit_proof(user_id, task_id, f"file{now}")
+    if op == "claim":
+        return [(p.user_id, p.task_id, p.file_id) for p in
+                repo.claim_proofs(admin_id, limit=3, lease_seconds=50, now=now)]
+    if op == "held":
+        return repo.held_proofs(admin_id, now=now)
+    if op == "approve":
+        return repo.approve_proof(admin_id, user_id, task_id, now=now)
+    if op == "reject":
+        return repo.reject_proof(admin_id, user_id, task_id, now=now)
+    if op == "archive":
+        return repo.archive_finalized() if now % 200 == 0 else None
+    if op == "remove":
+        return repo.remove_task(task_id) if now % 500 == 0 else None
+    if op == "points":
+        return repo.user_points(user_id), repo.is_completed(user_id, task_id)
+    if op == "leaderboard":
+        return sorted(points for _, points in repo.leaderboard(50))
+    raise ValueError(op)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_backends_agree(tmp_path, seed):
+    rng = random.Random(seed)
+    sqlite = SQLiteRepository(str(tmp_path / "parity.db"))
+    memory = MemoryRepository()
+    for repo in (sqlite, memory):
+        for i in range(5):
+            repo.add_task("crypto", "x", f"task {i}", 10 * (i + 1), None)
+
+    ops = ["mark", "submit", "submit", "claim", "held", "approve", "reject",
+           "archive", "remove", "points", "leaderboard"]
+    for now in range(1000, 3000):
+        args = (rng.choice(ops), rng.randint(1, 20), rng.randint(1, 6), rng.randint(1, 3), now)
+        assert step(sqlite, *args) == step(memory, *args), args
+
+    assert sorted(sqlite.known_user_ids()) == sorted(memory.known_user_ids())
+    sqlite.close()